@@ -7,7 +7,7 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import device_registry as dr
 
@@ -19,61 +19,93 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+_DATA_DISCOVERY_CACHE = f"{DOMAIN}_discovery_cache"
+
+# object_id suffixes that identify a Transit Tracker device, by entity domain,
+# mapped to the config role they fill. The schedule entity only marks the device.
+_ROLE_TABLE: dict[str, dict[str, str | None]] = {
+    "text": {
+        "_hidden_routes_config": CONF_HIDDEN_ROUTES_ENTITY,
+        "_hidden_routes": CONF_HIDDEN_ROUTES_ENTITY,
+        "_schedule_config": None,
+    },
+    "sensor": {
+        "_route_names": CONF_ROUTE_NAMES_ENTITY,
+    },
+}
+_SUFFIXES_BY_DOMAIN = {domain: tuple(table) for domain, table in _ROLE_TABLE.items()}
+_ROLE_COUNT = len(
+    {role for table in _ROLE_TABLE.values() for role in table.values() if role}
+)
+
+
+def _entity_suffix(domain: str, object_id: str) -> str | None:
+    """Return the Transit Tracker suffix object_id ends with, if any."""
+    suffixes = _SUFFIXES_BY_DOMAIN.get(domain)
+    if suffixes is None:
+        return None
+    return next((suffix for suffix in suffixes if object_id.endswith(suffix)), None)
+
 
-def _find_transit_tracker_devices(hass: HomeAssistant) -> dict[str, dict[str, str]]:
+def _entity_role(domain: str, object_id: str) -> str | None:
+    """Return the config role an entity fills, or None if it fills none."""
+    suffix = _entity_suffix(domain, object_id)
+    return None if suffix is None else _ROLE_TABLE[domain][suffix]
+
+
+@callback
+def _async_find_transit_tracker_devices(
+    hass: HomeAssistant,
+) -> dict[str, dict[str, str]]:
     """Find ESPHome Transit Tracker devices by looking for known entity patterns.
 
     Most config text entities (schedule_config, route_styles_config) are internal
     in ESPHome and not exposed to HA. We discover devices by looking for entities
     that ARE exposed: hidden_routes (text) and route_names (sensor).
+
+    Only reads the in-memory registries, so it must be called from the event
+    loop rather than dispatched to the executor.
     """
     registry = er.async_get(hass)
     dev_reg = dr.async_get(hass)
     devices: dict[str, dict[str, str]] = {}
 
-    # First pass: find devices by any recognizable Transit Tracker entity
-    device_ids: dict[str, str] = {}  # device_id -> prefix
+    # Single pass: bucket recognizable Transit Tracker entities by device
+    prefixes: dict[str, str] = {}  # device_id -> prefix
+    per_device: dict[str, dict[str, str]] = {}  # device_id -> role -> entity_id
     for entity in registry.entities.values():
-        eid = entity.entity_id
-        # Look for hidden_routes text entity or route_names sensor
-        if (
-            ("hidden_route" in eid and entity.domain == "text")
-            or ("route_names" in eid and entity.domain == "sensor")
-            or (eid.endswith("_schedule_config") and entity.domain == "text")
-        ):
-            if entity.device_id and entity.device_id not in device_ids:
-                # Derive a prefix for display
-                name_part = eid.split(".", 1)[1] if "." in eid else eid
-                # Strip known suffixes to get the device prefix
-                for suffix in (
-                    "_hidden_routes_config", "_hidden_routes",
-                    "_route_names", "_schedule_config",
-                ):
-                    if name_part.endswith(suffix):
-                        name_part = name_part[: -len(suffix)]
-                        break
-                device_ids[entity.device_id] = name_part
-
-    # Second pass: for each device, find all relevant sibling entities
-    for device_id, prefix in device_ids.items():
-        device = dev_reg.async_get(device_id)
-        device_name = device.name if device and device.name else prefix.replace("_", " ").title()
-
-        hidden_entity = ""
-        route_names_entity = ""
-
-        for entity in registry.entities.values():
-            if entity.device_id != device_id:
-                continue
-            eid = entity.entity_id
-            if "hidden_route" in eid and entity.domain == "text":
-                hidden_entity = eid
-            elif "route_names" in eid and entity.domain == "sensor":
-                route_names_entity = eid
+        # Transit Tracker devices are ESPHome; reject everything else first
+        if entity.platform != "esphome" or not entity.device_id:
+            continue
+        # Disabled entities have no state and cannot be written to
+        if entity.disabled_by is not None:
+            continue
+        roles = per_device.get(entity.device_id)
+        if roles is not None and len(roles) == _ROLE_COUNT:
+            continue  # Every role already found for this device
+        object_id = entity.entity_id.split(".", 1)[1]
+        suffix = _entity_suffix(entity.domain, object_id)
+        if suffix is None:
+            continue
+        # Derive a prefix for display from the first match on the device
+        prefixes.setdefault(entity.device_id, object_id.removesuffix(suffix))
+        roles = per_device.setdefault(entity.device_id, {})
+        role = _ROLE_TABLE[entity.domain][suffix]
+        if role is not None:
+            roles.setdefault(role, entity.entity_id)
+
+    # Second pass: resolve device names, no further registry scans
+    for device_id, prefix in prefixes.items():
+        roles = per_device[device_id]
+        hidden_entity = roles.get(CONF_HIDDEN_ROUTES_ENTITY, "")
+        route_names_entity = roles.get(CONF_ROUTE_NAMES_ENTITY, "")
 
         if not route_names_entity and not hidden_entity:
             continue  # Need at least one usable entity
 
+        device = dev_reg.async_get(device_id)
+        device_name = device.name if device and device.name else prefix.replace("_", " ").title()
+
         _LOGGER.debug(
             "Discovered device %s: hidden=%s, route_names=%s",
             device_name, hidden_entity, route_names_entity,
@@ -88,32 +120,78 @@ def _find_transit_tracker_devices(hass: HomeAssistant) -> dict[str, dict[str, st
     return devices
 
 
+@callback
+def _async_get_discovered_devices(hass: HomeAssistant) -> dict[str, dict[str, str]]:
+    """Return discovered devices, cached until the entity or device registry changes.
+
+    Discovery is a pure function of registry contents, so the result is shared
+    across config flows. The registry listeners only live while a result is
+    cached and are removed when it is dropped.
+    """
+    devices: dict[str, dict[str, str]] | None = hass.data.get(_DATA_DISCOVERY_CACHE)
+    if devices is not None:
+        return devices
+
+    devices = hass.data[_DATA_DISCOVERY_CACHE] = _async_find_transit_tracker_devices(
+        hass
+    )
+    unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def _async_invalidate(event: Event) -> None:
+        hass.data.pop(_DATA_DISCOVERY_CACHE, None)
+        while unsubs:
+            unsubs.pop()()
+
+    unsubs.extend(
+        hass.bus.async_listen(event_type, _async_invalidate)
+        for event_type in (
+            er.EVENT_ENTITY_REGISTRY_UPDATED,
+            dr.EVENT_DEVICE_REGISTRY_UPDATED,
+        )
+    )
+    return devices
+
+
 class TransitTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Transit Tracker."""
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._discovered_devices: dict[str, dict[str, str]] | None = None
+        self._device_options: dict[str, str] = {}
+
+    @callback
+    def _async_discovered_devices(self) -> dict[str, dict[str, str]]:
+        """Return discovered devices, scanning the registries once per flow."""
+        if self._discovered_devices is None:
+            devices = _async_get_discovered_devices(self.hass)
+            self._discovered_devices = devices
+            self._device_options = {
+                prefix: info["name"] for prefix, info in devices.items()
+            }
+        return self._discovered_devices
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
         """Handle the initial step."""
-        # Try auto-discovery (called directly, not via executor)
-        devices = _find_transit_tracker_devices(self.hass)
+        # Try auto-discovery (registry reads only, runs in the event loop)
+        devices = self._async_discovered_devices()
 
         if devices:
-            return await self.async_step_select_device(devices=devices)
+            return await self.async_step_select_device()
 
         # Fall back to manual entry
         return await self.async_step_manual()
 
     async def async_step_select_device(
-        self,
-        user_input: dict[str, Any] | None = None,
-        devices: dict[str, dict[str, str]] | None = None,
+        self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
         """Let the user select a discovered device."""
-        if devices is None:
-            devices = _find_transit_tracker_devices(self.hass)
+        devices = self._async_discovered_devices()
 
         if user_input is not None:
             selected = user_input["device"]
@@ -126,14 +204,10 @@ class TransitTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 },
             )
 
-        device_options = {
-            prefix: info["name"] for prefix, info in devices.items()
-        }
-
         return self.async_show_form(
             step_id="select_device",
             data_schema=vol.Schema(
-                {vol.Required("device"): vol.In(device_options)}
+                {vol.Required("device"): vol.In(self._device_options)}
             ),
         )
 
@@ -148,28 +222,29 @@ class TransitTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             # Validate the entity exists
             state = self.hass.states.get(route_names_entity)
+            ent_reg = er.async_get(self.hass)
+            ent_entry = ent_reg.async_get(route_names_entity)
             if state is None:
-                errors[CONF_ROUTE_NAMES_ENTITY] = "entity_not_found"
+                if ent_entry and ent_entry.disabled_by is not None:
+                    errors[CONF_ROUTE_NAMES_ENTITY] = "entity_disabled"
+                else:
+                    errors[CONF_ROUTE_NAMES_ENTITY] = "entity_not_found"
             else:
-                # Try to find hidden_routes entity on same device
-                ent_reg = er.async_get(self.hass)
-                ent_entry = ent_reg.async_get(route_names_entity)
-
+                # Try to find hidden_routes entity on same device, matching
+                # the same suffixes discovery uses
                 hidden_entity = ""
                 if ent_entry and ent_entry.device_id:
-                    for sibling in ent_reg.entities.values():
-                        if sibling.device_id != ent_entry.device_id:
-                            continue
-                        if "hidden_route" in sibling.entity_id and sibling.domain == "text":
+                    for sibling in er.async_entries_for_device(
+                        ent_reg, ent_entry.device_id
+                    ):
+                        object_id = sibling.entity_id.split(".", 1)[1]
+                        role = _entity_role(sibling.domain, object_id)
+                        if role == CONF_HIDDEN_ROUTES_ENTITY:
                             hidden_entity = sibling.entity_id
                             break
 
                 # Derive name from entity ID
-                name_part = route_names_entity.split(".", 1)[1] if "." in route_names_entity else route_names_entity
-                for suffix in ("_route_names",):
-                    if name_part.endswith(suffix):
-                        name_part = name_part[: -len(suffix)]
-                        break
+                name_part = route_names_entity.split(".", 1)[-1].removesuffix("_route_names")
 
                 return self.async_create_entry(
                     title=name_part.replace("_", " ").title(),
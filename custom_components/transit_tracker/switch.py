@@ -2,11 +2,17 @@
 from __future__ import annotations
 
 import logging
+import re
+import sys
+from collections.abc import Callable
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.restore_state import RestoreEntity
@@ -17,6 +23,20 @@ from .const import (
     CONF_ROUTE_NAMES_ENTITY,
 )
 
+# States that carry no route data; parsers also treat "" as empty
+_UNAVAILABLE_STATES = frozenset(("unknown", "unavailable"))
+_EMPTY_STATES = _UNAVAILABLE_STATES | {""}
+
+# One legacy route_names entry: compositeKey=routeName|headsign. Anchored to
+# the start of an entry so a malformed entry is skipped, not split mid-value.
+_ROUTE_ENTRY_RE = re.compile(r"(?:^|;)([^=;]+)=([^;]*)")
+
+# Seconds to wait for further toggles before writing hidden routes
+_HIDDEN_WRITE_COOLDOWN = 0.3
+
+# Characters in a composite key that are not unique_id safe
+_SLUG_TABLE = str.maketrans({":": "_", " ": "_"})
+
 
 def _parse_route_entry(value: str) -> tuple[str, str]:
     """Parse a route value that may contain a pipe-separated headsign.
@@ -24,23 +44,32 @@ def _parse_route_entry(value: str) -> tuple[str, str]:
     Input:  'routeName|headsign'  or  'routeName'
     Output: (route_name, headsign)
     """
-    if "|" in value:
-        name, headsign = value.split("|", 1)
+    name, sep, headsign = value.partition("|")
+    if sep:
         return name.strip(), headsign.strip()
     return value.strip(), ""
 
+
+def _format_route_name(route_name: str, headsign: str) -> str:
+    """Build the entity name from a route name and optional headsign."""
+    if headsign:
+        return f"{route_name} - {headsign}"
+    return route_name
+
+
 _LOGGER = logging.getLogger(__name__)
 
 
-def _parse_hidden_routes(hidden: str) -> set[str]:
+def _parse_hidden_routes(hidden: str) -> frozenset[str]:
     """Parse hidden routes text into a set of composite keys.
 
     Format: compositeKey;compositeKey;...
     Where compositeKey is routeId:headsign[:stopId]
     """
-    if not hidden or hidden in ("unknown", "unavailable"):
-        return set()
-    return {r.strip() for r in hidden.split(";") if r.strip()}
+    if hidden in _EMPTY_STATES:
+        return frozenset()
+    keys = (r.strip() for r in hidden.split(";"))
+    return frozenset(sys.intern(key) for key in keys if key)
 
 
 def _parse_route_names(names_str: str) -> dict[str, tuple[str, str]]:
@@ -50,19 +79,13 @@ def _parse_route_names(names_str: str) -> dict[str, tuple[str, str]]:
 
     Returns: dict of composite_key -> (route_name, headsign)
     """
-    names: dict[str, tuple[str, str]] = {}
-    if not names_str or names_str in ("unknown", "unavailable"):
-        return names
+    if names_str in _EMPTY_STATES:
+        return {}
 
-    for entry in names_str.split(";"):
-        entry = entry.strip()
-        if "=" in entry:
-            composite_key, value = entry.split("=", 1)
-            composite_key = composite_key.strip()
-            route_name, headsign = _parse_route_entry(value)
-            names[composite_key] = (route_name, headsign)
-
-    return names
+    return {
+        sys.intern(composite_key.strip()): _parse_route_entry(value)
+        for composite_key, value in _ROUTE_ENTRY_RE.findall(names_str)
+    }
 
 
 def _parse_single_route(state_str: str) -> tuple[str, str, str] | None:
@@ -71,14 +94,14 @@ def _parse_single_route(state_str: str) -> tuple[str, str, str] | None:
     Format: compositeKey=routeName|headsign
     Returns: (composite_key, route_name, headsign) or None
     """
-    if not state_str or state_str in ("unknown", "unavailable"):
+    if state_str in _EMPTY_STATES:
         return None
 
-    if "=" not in state_str:
+    composite_key, sep, value = state_str.partition("=")
+    if not sep:
         return None
 
-    composite_key, value = state_str.split("=", 1)
-    composite_key = composite_key.strip()
+    composite_key = sys.intern(composite_key.strip())
     route_name, headsign = _parse_route_entry(value)
 
     return composite_key, route_name, headsign
@@ -123,6 +146,45 @@ class RouteCoordinator:
         self.route_names_entity_id = route_names_entity_id
         self._switches: dict[str, TransitRouteSwitch] = {}
         self._async_add_entities: AddEntitiesCallback | None = None
+        self._hidden_cache: tuple[str, frozenset[str]] | None = None
+        self._hidden_prev: frozenset[str] | None = None
+        # Whether the firmware currently reports a real hidden_routes value
+        self._hidden_known = False
+        self._last_route_names_str: str | None = None
+        self._pending_add: list[TransitRouteSwitch] = []
+        self._dispatch_table: dict[str, Callable[[Event], None]] = {}
+        self._hidden_write_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=_HIDDEN_WRITE_COOLDOWN,
+            immediate=False,
+            function=self._async_write_hidden_routes,
+        )
+        # Send a write still waiting in the cooldown rather than dropping it
+        entry.async_on_unload(self._async_flush_hidden_write)
+        entry.async_on_unload(
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_flush_hidden_write
+            )
+        )
+        # Keys toggled here since the last write started; incoming
+        # hidden_routes values must not override them before they are sent
+        self._local_keys: set[str] = set()
+        # Hidden sets written to the firmware whose state echo is still due
+        self._written_hidden: list[frozenset[str]] = []
+        self._visible_count = 0
+        self._hidden_keys: set[str] = set()
+        self._available_keys: set[str] = set()
+
+    def _get_hidden(self, raw: str) -> frozenset[str]:
+        """Return the parsed hidden routes for raw, reusing the last parse."""
+        if self._hidden_cache is None or self._hidden_cache[0] != raw:
+            self._hidden_cache = (raw, _parse_hidden_routes(raw))
+        return self._hidden_cache[1]
+
+    def _current_hidden(self) -> frozenset[str]:
+        """Return the last parsed hidden routes, kept fresh by the hidden listener."""
+        return self._hidden_cache[1] if self._hidden_cache else frozenset()
 
     async def async_initial_setup(
         self, async_add_entities: AddEntitiesCallback
@@ -134,18 +196,29 @@ class RouteCoordinator:
         hidden_state = self.hass.states.get(self.hidden_entity_id)
         route_names_state = self.hass.states.get(self.route_names_entity_id)
 
-        _LOGGER.debug(
-            "Initial states - hidden_entity=%s (%s), route_names_entity=%s (%s)",
-            self.hidden_entity_id,
-            hidden_state,
-            self.route_names_entity_id,
-            route_names_state,
-        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Initial states - hidden_entity=%s (%s), route_names_entity=%s (%s)",
+                self.hidden_entity_id,
+                hidden_state,
+                self.route_names_entity_id,
+                route_names_state,
+            )
 
         hidden_str = hidden_state.state if hidden_state else ""
         route_names_str = route_names_state.state if route_names_state else ""
 
-        hidden = _parse_hidden_routes(hidden_str)
+        hidden = self._get_hidden(hidden_str)
+        self._hidden_known = (
+            hidden_state is not None and hidden_str not in _UNAVAILABLE_STATES
+        )
+        if self._hidden_known:
+            # Switches start from this value, so later events only need a diff
+            self._hidden_prev = hidden
+
+        # Seed the repeat check so re-published copies of this value are free
+        if route_names_str not in _UNAVAILABLE_STATES:
+            self._last_route_names_str = route_names_str
 
         # Try single-route format first
         parsed = _parse_single_route(route_names_str)
@@ -155,35 +228,38 @@ class RouteCoordinator:
         else:
             # Legacy multi-route format
             route_names = _parse_route_names(route_names_str)
-            _LOGGER.debug(
-                "Parsed %d routes from route_names: %s",
-                len(route_names), route_names,
-            )
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Parsed %d routes from route_names: %s",
+                    len(route_names), route_names,
+                )
             self._create_switches_from_routes(route_names, hidden)
 
-        # Listen for route_names changes (routes appearing/disappearing)
-        if self.route_names_entity_id:
-            async_track_state_change_event(
-                self.hass,
-                [self.route_names_entity_id],
-                self._handle_route_names_change,
+        # Listen for route_names changes (routes appearing/disappearing) and
+        # hidden_routes changes (external visibility changes) in one listener
+        self._dispatch_table = {
+            entity_id: handler
+            for entity_id, handler in (
+                (self.route_names_entity_id, self._handle_route_names_change),
+                (self.hidden_entity_id, self._handle_hidden_change),
             )
-
-        # Listen for hidden_routes changes (external visibility changes)
-        if self.hidden_entity_id:
-            async_track_state_change_event(
-                self.hass,
-                [self.hidden_entity_id],
-                self._handle_hidden_change,
+            if entity_id
+        }
+        if self._dispatch_table:
+            self.entry.async_on_unload(
+                async_track_state_change_event(
+                    self.hass, list(self._dispatch_table), self._handle_state_change,
+                )
             )
 
     def _create_switches_from_routes(
-        self, route_names: dict[str, tuple[str, str]], hidden: set[str]
+        self, route_names: dict[str, tuple[str, str]], hidden: frozenset[str]
     ) -> None:
         """Create switch entities for routes that don't have one yet."""
         new_switches = []
         for composite_key, (route_name, headsign) in route_names.items():
-            if composite_key not in self._switches:
+            existing = self._switches.get(composite_key)
+            if existing is None:
                 switch = TransitRouteSwitch(
                     coordinator=self,
                     composite_key=composite_key,
@@ -191,36 +267,38 @@ class RouteCoordinator:
                     headsign=headsign,
                     is_hidden=composite_key in hidden,
                     entry_id=self.entry.entry_id,
+                    restore=not self._hidden_known,
                 )
                 self._switches[composite_key] = switch
                 new_switches.append(switch)
             else:
                 # Update display name if changed
-                self._switches[composite_key].update_display_name(route_name, headsign)
+                existing.update_display_name(route_name, headsign)
 
         if new_switches and self._async_add_entities:
             _LOGGER.debug("Adding %d new route switches", len(new_switches))
             self._async_add_entities(new_switches)
 
-        # Mark routes not in current route_names as unavailable
-        current_keys = set(route_names.keys())
-        for key, switch in self._switches.items():
-            if key not in current_keys:
-                switch.set_available(False)
-            else:
-                switch.set_available(True)
+        # Mark routes not in current route_names as unavailable; only
+        # switches whose availability actually flips are touched
+        current_keys = route_names.keys()
+        for key in self._available_keys - current_keys:
+            self._switches[key].set_available(False)
+        for key in current_keys - self._available_keys:
+            self._switches[key].set_available(True)
 
     def _upsert_switch(
         self,
         composite_key: str,
         route_name: str,
         headsign: str,
-        hidden: set[str],
+        hidden: frozenset[str],
     ) -> None:
         """Create or update a single switch for a route."""
-        if composite_key in self._switches:
-            self._switches[composite_key].update_display_name(route_name, headsign)
-            self._switches[composite_key].set_available(True)
+        existing = self._switches.get(composite_key)
+        if existing is not None:
+            existing.update_display_name(route_name, headsign)
+            existing.set_available(True)
         else:
             switch = TransitRouteSwitch(
                 coordinator=self,
@@ -229,11 +307,30 @@ class RouteCoordinator:
                 headsign=headsign,
                 is_hidden=composite_key in hidden,
                 entry_id=self.entry.entry_id,
+                restore=not self._hidden_known,
             )
             self._switches[composite_key] = switch
             if self._async_add_entities:
-                _LOGGER.debug("Adding route switch: %s", composite_key)
-                self._async_add_entities([switch])
+                # Firmware often publishes several routes back-to-back; add
+                # everything created in this loop iteration in one call
+                if not self._pending_add:
+                    self.hass.loop.call_soon(self._flush_pending_adds)
+                self._pending_add.append(switch)
+
+    @callback
+    def _flush_pending_adds(self) -> None:
+        """Add the switches queued by _upsert_switch in one batch."""
+        pending, self._pending_add = self._pending_add, []
+        if pending and self._async_add_entities:
+            _LOGGER.debug("Adding %d route switches", len(pending))
+            self._async_add_entities(pending)
+
+    @callback
+    def _handle_state_change(self, event) -> None:
+        """Dispatch a tracked entity's state change to its handler."""
+        handler = self._dispatch_table.get(event.data["entity_id"])
+        if handler is not None:
+            handler(event)
 
     @callback
     def _handle_route_names_change(self, event) -> None:
@@ -244,15 +341,22 @@ class RouteCoordinator:
 
         state_str = new_state.state
 
+        # Firmware re-publishes the same text on every poll; skip repeats. An
+        # unknown/unavailable state resets this so the next real value runs.
+        if state_str == self._last_route_names_str:
+            return
+        if state_str in _UNAVAILABLE_STATES:
+            self._last_route_names_str = None
+            return
+        self._last_route_names_str = state_str
+
         # Single-route format: compositeKey=routeName|headsign
         parsed = _parse_single_route(state_str)
         if parsed is not None:
             composite_key, route_name, headsign = parsed
-            hidden_state = self.hass.states.get(self.hidden_entity_id)
-            hidden = _parse_hidden_routes(
-                hidden_state.state if hidden_state else ""
+            self._upsert_switch(
+                composite_key, route_name, headsign, self._current_hidden()
             )
-            self._upsert_switch(composite_key, route_name, headsign, hidden)
             return
 
         # Legacy multi-route format fallback
@@ -260,14 +364,10 @@ class RouteCoordinator:
         if not route_names:
             return
 
-        _LOGGER.debug("Route names updated (legacy): %s", route_names)
-
-        hidden_state = self.hass.states.get(self.hidden_entity_id)
-        hidden = _parse_hidden_routes(
-            hidden_state.state if hidden_state else ""
-        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Route names updated (legacy): %s", route_names)
 
-        self._create_switches_from_routes(route_names, hidden)
+        self._create_switches_from_routes(route_names, self._current_hidden())
 
     @callback
     def _handle_hidden_change(self, event) -> None:
@@ -276,45 +376,140 @@ class RouteCoordinator:
         if new_state is None:
             return
 
-        hidden = _parse_hidden_routes(new_state.state)
-        for composite_key, switch in self._switches.items():
-            should_be_on = composite_key not in hidden
-            if switch.is_on != should_be_on:
-                switch.set_visibility(should_be_on)
+        if new_state.state in _UNAVAILABLE_STATES:
+            # Device offline: keep switches as they are, reconcile fully later
+            self._hidden_prev = None
+            self._hidden_known = False
+            self._written_hidden.clear()
+            return
+
+        self._hidden_known = True
+        hidden = self._get_hidden(new_state.state)
+        prev = self._hidden_prev
+        if hidden is prev:
+            return  # Same raw string as last time, nothing changed
+        self._hidden_prev = hidden
+
+        # Echo of one of our own writes: the switches already hold that state
+        # or a newer one, so applying it would revert later toggles
+        written = self._written_hidden
+        if hidden in written:
+            del written[: written.index(hidden) + 1]
+            return
+        written.clear()
+
+        # Only routes whose membership changed need touching; reconcile
+        # every switch on the first event since there is nothing to diff.
+        # Keys toggled since the last write keep the user's newer choice.
+        changed = self._switches.keys() if prev is None else hidden ^ prev
+        local = self._local_keys
+        for composite_key in changed:
+            if composite_key in local:
+                continue
+            switch = self._switches.get(composite_key)
+            if switch is not None:
+                switch.set_visibility(composite_key not in hidden)
+
+    @callback
+    def track_switch_state(
+        self, composite_key: str, was_visible: bool, is_on: bool, available: bool
+    ) -> None:
+        """Record a switch state transition in the coordinator's tallies."""
+        self._visible_count += (is_on and available) - was_visible
+        if is_on:
+            self._hidden_keys.discard(composite_key)
+        else:
+            self._hidden_keys.add(composite_key)
+        if available:
+            self._available_keys.add(composite_key)
+        else:
+            self._available_keys.discard(composite_key)
 
     def count_visible_routes(self) -> int:
         """Return the number of currently visible (on) routes."""
-        return sum(1 for s in self._switches.values() if s.is_on and s.available)
+        return self._visible_count
 
-    async def async_update_hidden_routes(self) -> None:
-        """Write the current hidden routes to the firmware entity."""
+    async def async_update_hidden_routes(self, composite_key: str) -> None:
+        """Schedule a write of the current hidden routes to the firmware entity.
+
+        Toggles within the cooldown collapse into a single write.
+        """
         if not self.hidden_entity_id:
             _LOGGER.warning("No hidden_routes entity configured, cannot update")
             return
 
-        hidden_ids = [
-            composite_key
-            for composite_key, switch in self._switches.items()
-            if not switch.is_on
-        ]
-        hidden_str = ";".join(hidden_ids)
+        self._local_keys.add(composite_key)
+        await self._hidden_write_debouncer.async_call()
+
+    async def _async_flush_hidden_write(self, _event: Event | None = None) -> None:
+        """Write pending toggles now instead of waiting out the cooldown."""
+        self._hidden_write_debouncer.async_cancel()
+        if self._local_keys:
+            await self._async_write_hidden_routes()
+
+    async def _async_write_hidden_routes(self) -> None:
+        """Write the current hidden routes to the firmware entity."""
+        # Walk keys only (never the entities) to keep the firmware string in
+        # stable switch-creation order
+        hidden_keys = self._hidden_keys
+        hidden_str = ";".join(key for key in self._switches if key in hidden_keys)
+        self._local_keys.clear()
+
+        # An unchanged value produces no state event, so expect no echo
+        state = self.hass.states.get(self.hidden_entity_id)
+        expected = None
+        if state is None or state.state != hidden_str:
+            expected = _parse_hidden_routes(hidden_str)
+            self._written_hidden.append(expected)
 
         _LOGGER.debug("Updating hidden routes: %s", hidden_str)
 
-        await self.hass.services.async_call(
-            "text",
-            "set_value",
-            {
-                "entity_id": self.hidden_entity_id,
-                "value": hidden_str,
-            },
-        )
+        try:
+            await self.hass.services.async_call(
+                "text",
+                "set_value",
+                {
+                    "entity_id": self.hidden_entity_id,
+                    "value": hidden_str,
+                },
+                blocking=True,
+            )
+        except HomeAssistantError as err:
+            _LOGGER.error(
+                "Failed to update %s, resyncing route switches: %s",
+                self.hidden_entity_id,
+                err,
+            )
+            if expected is not None and expected in self._written_hidden:
+                self._written_hidden.remove(expected)
+            self._resync_switches()
+
+    @callback
+    def _resync_switches(self) -> None:
+        """Reset every switch to the last hidden_routes value the firmware reported."""
+        self._local_keys.clear()
+        if not self._hidden_known:
+            return  # Nothing authoritative to resync to
+        hidden = self._current_hidden()
+        for composite_key, switch in self._switches.items():
+            switch.set_visibility(composite_key not in hidden)
 
 
 class TransitRouteSwitch(SwitchEntity, RestoreEntity):
     """Switch entity representing a transit route's visibility."""
 
+    # Entity itself has no __slots__, so instances keep a __dict__ for the
+    # _attr_* attributes; slotting our own fields still trims each instance.
+    __slots__ = (
+        "_coordinator",
+        "_composite_key",
+        "_is_on",
+        "_available",
+        "_restore",
+    )
+
     _attr_has_entity_name = True
+    _attr_icon = "mdi:bus"
 
     def __init__(
         self,
@@ -324,26 +519,28 @@ class TransitRouteSwitch(SwitchEntity, RestoreEntity):
         headsign: str,
         is_hidden: bool,
         entry_id: str,
+        restore: bool = True,
     ) -> None:
         self._coordinator = coordinator
         self._composite_key = composite_key
-        self._route_name = route_name
-        self._headsign = headsign
         self._is_on = not is_hidden
         self._available = True
+        # is_hidden is authoritative when it came from a live hidden_routes value
+        self._restore = restore
+        coordinator.track_switch_state(composite_key, False, self._is_on, True)
 
         # Build a slug-safe unique_id from the composite key
-        slug = composite_key.replace(":", "_").replace(" ", "_").lower()
+        slug = composite_key.translate(_SLUG_TABLE).lower()
         self._attr_unique_id = f"{entry_id}_route_{slug}"
-        self._update_name()
-        self._attr_icon = "mdi:bus"
+        self._attr_name = _format_route_name(route_name, headsign)
 
-    def _update_name(self) -> None:
-        """Set the entity name from route_name and headsign."""
-        if self._headsign:
-            self._attr_name = f"{self._route_name} - {self._headsign}"
-        else:
-            self._attr_name = self._route_name
+    def _set_state(self, is_on: bool, available: bool) -> None:
+        """Update the on/available flags, keeping the coordinator's tallies in sync."""
+        self._coordinator.track_switch_state(
+            self._composite_key, self._is_on and self._available, is_on, available
+        )
+        self._is_on = is_on
+        self._available = available
 
     @property
     def is_on(self) -> bool:
@@ -357,12 +554,16 @@ class TransitRouteSwitch(SwitchEntity, RestoreEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Show this route on the display."""
-        self._is_on = True
+        if self._is_on:
+            return
+        self._set_state(True, self._available)
         self.async_write_ha_state()
-        await self._coordinator.async_update_hidden_routes()
+        await self._coordinator.async_update_hidden_routes(self._composite_key)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Hide this route from the display."""
+        if not self._is_on:
+            return
         # Enforce at least one route must remain visible
         if self._coordinator.count_visible_routes() <= 1:
             _LOGGER.warning(
@@ -370,36 +571,49 @@ class TransitRouteSwitch(SwitchEntity, RestoreEntity):
                 self._composite_key,
             )
             return
-        self._is_on = False
+        self._set_state(False, self._available)
+        self.async_write_ha_state()
+        await self._coordinator.async_update_hidden_routes(self._composite_key)
+
+    @callback
+    def _async_write_state_if_added(self) -> None:
+        """Write state, unless the entity has not been added to hass yet.
+
+        Switches can be updated between creation and registration; their
+        attributes still change and are picked up when they are added.
+        """
+        if self.hass is None or not self.entity_id:
+            return
         self.async_write_ha_state()
-        await self._coordinator.async_update_hidden_routes()
 
     @callback
     def set_available(self, available: bool) -> None:
         """Set the availability of this switch."""
         if self._available != available:
-            self._available = available
-            self.async_write_ha_state()
+            self._set_state(self._is_on, available)
+            self._async_write_state_if_added()
 
     @callback
     def set_visibility(self, visible: bool) -> None:
         """Set visibility from external hidden_routes change."""
         if self._is_on != visible:
-            self._is_on = visible
-            self.async_write_ha_state()
+            self._set_state(visible, self._available)
+            self._async_write_state_if_added()
 
     @callback
     def update_display_name(self, route_name: str, headsign: str) -> None:
         """Update the display name."""
-        if self._route_name != route_name or self._headsign != headsign:
-            self._route_name = route_name
-            self._headsign = headsign
-            self._update_name()
-            self.async_write_ha_state()
+        name = _format_route_name(route_name, headsign)
+        if name == self._attr_name:
+            return
+        self._attr_name = name
+        self._async_write_state_if_added()
 
     async def async_added_to_hass(self) -> None:
         """Restore last state on startup."""
         await super().async_added_to_hass()
+        if not self._restore:
+            return
         last_state = await self.async_get_last_state()
         if last_state is not None:
-            self._is_on = last_state.state == "on"
+            self._set_state(last_state.state == "on", self._available)